@@ -1,11 +1,15 @@
+import json
+import os
+import tempfile
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from itertools import repeat
 from os.path import join as pjoin 
 from pathlib import Path
-import glob
 import streamlit as st
-from plotutils import * 
-import pandas as pd
+from plotutils import create_plotly_bb, create_plotly_psd, create_plotly_spectrogram
+import numpy as np
 import datetime
-from datetime import datetime as dt
 
 # In your Streamlit app:
 
@@ -18,7 +22,133 @@ st.set_page_config(
     layout="wide"
 )
 
-def find_files_by_date(location, selected_date, file_extensions=['.wav', '.pickle']):
+# Character positions of the HH, MM and SS digits in a YYYY-MM-DDTHH-MM-SS-fff
+# timestamp, and the number of seconds each digit is worth
+TIME_DIGIT_COLUMNS = [11, 12, 14, 15, 17, 18]
+TIME_DIGIT_WEIGHTS = [36000, 3600, 600, 60, 10, 1]
+
+# Threads used to scan recording directories in find_files_by_date()
+MAX_SCAN_WORKERS = 8
+
+# Directories of a recording directory that find_files_by_date() reads; their
+# modification times decide whether the on-disk file index is stale
+INDEXED_SUBDIRS = ["wav", "pkl/bb", "pkl/psd"]
+
+# Bumped when the layout of the on-disk file index changes. The index only
+# records which files exist; which of a pickle and its Parquet copy to read
+# is decided by load_frame(), since rewriting a file in place does not
+# change its directory's mtime.
+INDEX_VERSION = 2
+
+# Extensions of the processed bb/psd DataFrames under pkl/. Parquet files
+# (see scripts/pickle_to_parquet.py) are preferred over pickles when both
+# exist, unless the pickle is newer.
+PARQUET_EXT = ".parquet"
+PICKLE_EXT = ".pickle"
+
+def _scan_recording_dir(subdir_path, prefix, file_extensions):
+    """
+    Collect the wav and pkl files of one recording directory whose names
+    start with prefix.
+    
+    Returns:
+        dict: Dictionary with timestamps as keys and file paths as values.
+              bb/psd map to a list of the pickle and/or Parquet paths.
+    """
+    local_files = defaultdict(dict)
+    
+    # Search in wav subdirectory. Missing subdirectories are rare, so just try
+    # to open them rather than stat'ing each one first
+    wav_dir = pjoin(subdir_path, "wav")
+    try:
+        with os.scandir(wav_dir) as it:
+            for entry in it:
+                name = entry.name
+                if not name.startswith(prefix):
+                    continue
+                for ext in file_extensions:
+                    if name.endswith(ext):
+                        # Extract timestamp from filename (without extension)
+                        timestamp = name[:-len(ext)]
+                        local_files[timestamp][ext] = entry.path
+                        break
+    except (FileNotFoundError, NotADirectoryError):
+        pass
+    
+    # Also search in pkl subdirectories if they exist
+    pkl_dirs = ["pkl/bb", "pkl/psd"]
+    for pkl_subdir in pkl_dirs:
+        pkl_path = pjoin(subdir_path, pkl_subdir)
+        pkl_type=pkl_subdir.split("/")[1]
+        try:
+            with os.scandir(pkl_path) as it:
+                for entry in it:
+                    name = entry.name
+                    if not name.startswith(prefix):
+                        continue
+                    # Both the pickle and its Parquet copy are kept; load_frame()
+                    # picks the fresher one when the data is loaded
+                    for ext in (PARQUET_EXT, PICKLE_EXT):
+                        if name.endswith(ext):
+                            timestamp = name[:-len(ext)]
+                            local_files[timestamp].setdefault(pkl_type, []).append(entry.path)
+                            break
+        except (FileNotFoundError, NotADirectoryError):
+            pass
+    
+    return dict(local_files)
+
+def _index_fingerprint(subdirs):
+    """
+    Modification times of the wav and pkl directories of each recording
+    directory. Adding or removing a file, or a recording directory, changes it.
+    """
+    fingerprint = {}
+    for subdir_path in subdirs:
+        for leaf in INDEXED_SUBDIRS:
+            leaf_path = pjoin(subdir_path, leaf)
+            try:
+                fingerprint[leaf_path] = os.stat(leaf_path).st_mtime_ns
+            except FileNotFoundError:
+                fingerprint[leaf_path] = None
+    return fingerprint
+
+def _load_index(idx_path, fingerprint, file_extensions):
+    try:
+        meta = json.loads(idx_path.read_text())
+        if (meta["version"] == INDEX_VERSION
+                and meta["fingerprint"] == fingerprint
+                and meta["file_extensions"] == list(file_extensions)):
+            return meta["files"]
+    except (OSError, ValueError, TypeError, KeyError):
+        # Missing, unreadable or malformed indexes are rebuilt by the caller
+        pass
+    return None
+
+def _save_index(idx_path, fingerprint, file_extensions, files):
+    # Write to a temporary file first so other sessions and processes never
+    # read a partially written index
+    tmp_file = None
+    try:
+        with tempfile.NamedTemporaryFile("w", dir=idx_path.parent, prefix=f"{idx_path.name}.",
+                                         suffix=".tmp", delete=False) as tmp_file:
+            json.dump({
+                "version": INDEX_VERSION,
+                "fingerprint": fingerprint,
+                "file_extensions": list(file_extensions),
+                "files": files
+            }, tmp_file)
+        os.replace(tmp_file.name, idx_path)
+    except OSError:
+        # The index is only an optimization, e.g. output/ may be read-only
+        if tmp_file is not None:
+            try:
+                os.unlink(tmp_file.name)
+            except OSError:
+                pass
+
+@st.cache_data(ttl=300, show_spinner=False)
+def find_files_by_date(location, selected_date, file_extensions=('.wav', '.pickle')):
     """
     Helper function to find all files in subdirectories under a location 
     that start with the given date.
@@ -26,59 +156,115 @@ def find_files_by_date(location, selected_date, file_extensions=['.wav', '.pickl
     Args:
         location (str): Hydrophone location name
         selected_date (datetime.date): Date to search for
-        file_extensions (list): List of file extensions to search for
+        file_extensions (tuple): File extensions to search for
     
     Returns:
-        dict: Dictionary with timestamps as keys and file paths as values
+        dict: Dictionary with timestamps as keys and file paths as values.
+              bb/psd map to a list of paths to be passed to load_frame().
+    
+    Results are cached for 5 minutes so widget reruns don't rescan the tree,
+    and written to output/<location>/.index-<date>.json so new Streamlit
+    processes can reuse them until a wav/pkl directory changes.
+    Subdirectories are scanned on a small thread pool since the work is
+    dominated by directory reads.
     """
     data_path = Path(f"output/{location}")
     
     # Convert date to the expected filename format: YYYY-MM-DD
     date_str = selected_date.strftime("%Y-%m-%d")
     
-    matching_files = {}
+    matching_files = defaultdict(dict)
     
     if not data_path.exists():
-        return matching_files
+        return {}
+    
+    prefix = date_str + "T"
     
     # Go through all subdirectories
-    for subdir in data_path.iterdir():
-        if subdir.is_dir():
-            # Search in wav subdirectory
-            wav_dir = subdir / "wav"
-            if wav_dir.exists():
-                for ext in file_extensions:
-                    pattern = f"{date_str}T*{ext}"
-                    files = list(wav_dir.glob(pattern))
-                    
-                    for file_path in files:
-                        # Extract timestamp from filename (without extension)
-                        timestamp = file_path.stem
-                        if timestamp not in matching_files:
-                            matching_files[timestamp] = {}
-                        matching_files[timestamp][ext] = str(file_path)
-            
-            # Also search in pkl subdirectories if they exist
-            pkl_dirs = ["pkl/bb", "pkl/psd"]
-            for pkl_subdir in pkl_dirs:
-                pkl_path = subdir / pkl_subdir
-                pkl_type=pkl_subdir.split("/")[1]
-                if pkl_path.exists():
-                    pattern = f"{date_str}T*.pickle"
-                    files = list(pkl_path.glob(pattern))
-                    
-                    for file_path in files:
-                        timestamp = file_path.stem
-                        if timestamp not in matching_files:
-                            matching_files[timestamp] = {}
-                        matching_files[timestamp][pkl_type] = str(file_path)
+    with os.scandir(data_path) as it:
+        subdirs = [entry.path for entry in it if entry.is_dir(follow_symlinks=False)]
+    
+    if not subdirs:
+        return {}
+    
+    idx_path = data_path / f".index-{date_str}.json"
+    fingerprint = _index_fingerprint(subdirs)
+    cached_files = _load_index(idx_path, fingerprint, file_extensions)
+    if cached_files is not None:
+        return cached_files
+    
+    with ThreadPoolExecutor(max_workers=min(MAX_SCAN_WORKERS, len(subdirs))) as executor:
+        scans = executor.map(_scan_recording_dir, subdirs,
+                             repeat(prefix), repeat(file_extensions))
+        for local_files in scans:
+            for timestamp, files in local_files.items():
+                matching_files[timestamp].update(files)
     
+    matching_files = dict(matching_files)
+    _save_index(idx_path, fingerprint, file_extensions, matching_files)
     return matching_files
 
+@st.cache_resource(max_entries=32, show_spinner=False)
+def _read_frame(path, mtime):
+    """
+    Load a Parquet or pickled DataFrame. The file's mtime is part of the cache
+    key so regenerated files are picked up on the next rerun.
+    
+    The same DataFrame object is shared by every rerun and session, so callers
+    must not modify it in place.
+    """
+    import pandas as pd
+    if not path.endswith(PARQUET_EXT):
+        return pd.read_pickle(path)
+    
+    df = pd.read_parquet(path)
+    # Parquet only stores string column names; restore numeric frequency bins
+    try:
+        df.columns = pd.to_numeric(df.columns)
+    except (TypeError, ValueError):
+        pass
+    return df
+
+def load_frame(paths):
+    """
+    Load the bb/psd DataFrame of a timestamp from the paths found by
+    find_files_by_date(). The Parquet copy is used unless the pickle was
+    rewritten after it.
+    """
+    mtimes = {}
+    for path in paths:
+        try:
+            mtimes[path] = os.path.getmtime(path)
+        except FileNotFoundError:
+            pass
+    if not mtimes:
+        raise FileNotFoundError(f"No such file: {', '.join(paths)}")
+    
+    # Newest file wins; on a tie the Parquet copy is preferred
+    path = max(mtimes, key=lambda p: (mtimes[p], p.endswith(PARQUET_EXT)))
+    return _read_frame(path, mtimes[path])
+
+@st.cache_data(max_entries=16, show_spinner=False)
+def _spectrogram_figure(path, mtime, nfft):
+    """
+    Build the WAV spectrogram figure. Keyed on the file's mtime like
+    _read_frame so repeated views of a timestamp skip the FFTs. Figures are
+    large, so only the most recent ones are kept.
+    """
+    return create_plotly_spectrogram(path, nfft=nfft)
+
+def spectrogram_figure(path, nfft=256):
+    return _spectrogram_figure(path, os.path.getmtime(path), nfft)
+
 def filter_timestamps_by_time_range(available_files, start_time, end_time):
     """
     Filter timestamps based on time range.
     
+    Both ends are inclusive, and an end time in whole minutes (as picked in
+    the sidebar) covers that whole minute, so 07:00 to 07:00 keeps the files
+    recorded during 07:00. A start time after the end time is an overnight
+    range. Timestamps that don't match YYYY-MM-DDTHH-MM-SS-fff are skipped.
+    
     Args:
         available_files (dict): Dictionary of available files by timestamp
         start_time (datetime.time): Start time filter
@@ -87,220 +273,277 @@ def filter_timestamps_by_time_range(available_files, start_time, end_time):
     Returns:
         dict: Filtered dictionary of available files
     """
-    filtered_files = {}
+    if not available_files:
+        return {}
     
-    for timestamp, files in available_files.items():
-        try:
-            # Parse timestamp format: YYYY-MM-DDTHH-MM-SS-fff
-            # Convert to datetime to extract time
-            timestamp_dt = dt.strptime(timestamp, "%Y-%m-%dT%H-%M-%S-%f")
-            file_time = timestamp_dt.time()
-            
-            # Check if file time is within the specified range
-            if start_time <= end_time:
-                # Normal case: start_time < end_time (e.g., 08:00 to 18:00)
-                if start_time <= file_time <= end_time:
-                    filtered_files[timestamp] = files
-            else:
-                # Handle overnight range: start_time > end_time (e.g., 22:00 to 06:00)
-                if file_time >= start_time or file_time <= end_time:
-                    filtered_files[timestamp] = files
-                    
-        except ValueError:
-            # Skip timestamps that don't match expected format
-            continue
+    start_s = start_time.hour * 3600 + start_time.minute * 60 + start_time.second
+    end_s = end_time.hour * 3600 + end_time.minute * 60 + end_time.second
+    # The sidebar picks whole minutes, so an end time of HH:MM covers the
+    # files recorded during that minute
+    if end_time.second == 0:
+        end_s += 59
+    
+    # Timestamp format is fixed (YYYY-MM-DDTHH-MM-SS-fff), so view the keys as
+    # a matrix of code points and read the HH, MM and SS digits by column.
+    # Longer keys are truncated by the fixed-width array, so keys are looked
+    # up from the original list and any key that isn't 23 characters is skipped
+    keys = list(available_files)
+    ts_arr = np.asarray(keys, dtype='U23')
+    digits = ts_arr.view(np.uint32).reshape(-1, 23)[:, TIME_DIGIT_COLUMNS].astype(np.int64) - ord('0')
+    
+    # Skip timestamps that don't match expected format
+    valid = ((digits >= 0) & (digits <= 9)).all(axis=1)
+    valid &= np.fromiter((len(k) == 23 for k in keys), dtype=bool, count=len(keys))
+    # ... and that the hour is at most 23 and the minutes and seconds at most 59
+    valid &= digits[:, 0] * 10 + digits[:, 1] <= 23
+    valid &= (digits[:, 2] <= 5) & (digits[:, 4] <= 5)
+    
+    # The sidebar's default range covers the whole day, so no time comparison
+    # is needed; malformed keys are still dropped as for any other range
+    if start_s == 0 and end_s >= 86399:
+        if valid.all():
+            return available_files
+        return {keys[i]: available_files[keys[i]] for i in np.flatnonzero(valid)}
+    
+    seconds_of_day = digits @ TIME_DIGIT_WEIGHTS
+    
+    # Check if file time is within the specified range
+    if start_s <= end_s:
+        # Normal case: start_time < end_time (e.g., 08:00 to 18:00)
+        mask = (seconds_of_day >= start_s) & (seconds_of_day <= end_s)
+    else:
+        # Handle overnight range: start_time > end_time (e.g., 22:00 to 06:00)
+        mask = (seconds_of_day >= start_s) | (seconds_of_day <= end_s)
+    
+    filtered_files = {}
+    for i in np.flatnonzero(mask & valid):
+        timestamp = keys[i]
+        filtered_files[timestamp] = available_files[timestamp]
     
     return filtered_files
 
-def create_sidebar_layout():
-    st.title("🔊 Orcasound Shipnoise Analyzer")
+@st.fragment
+def sidebar_controls():
+    """
+    Sidebar widgets. Runs as a fragment, so changing a filter only reruns the
+    sidebar and leaves the plots already drawn in the main area alone.
+    Clicking "Generate Graphs" stores the selection in st.session_state and
+    reruns the whole app to draw it.
+    """
+    st.header("📊 Data Selection")
     
-    # Sidebar for controls
-    with st.sidebar:
-        st.header("📊 Data Selection")
+    # Location selection
+    st.subheader("🗺️ Location")
+    locations = [
+        "bush_point", 
+        "orcasound_lab", 
+        "port_townsend", 
+        "sunset_bay", 
+        "sandbox"
+    ]
+    selected_location = st.selectbox(
+        "Choose hydrophone location:",
+        locations,
+        index=1  # Default to orcasound_lab
+    )
+    
+    # Fixed date - representing latest 24 hours (demo data from 2025-09-01)
+    selected_date = datetime.date(2025, 9, 1)
+    
+    # Show current data period
+    st.subheader("📅 Data Period")
+    st.info(f"Latest 24 Hours: {selected_date.strftime('%Y-%m-%d')}")
+    st.caption("Demo data - In production, this would show the most recent 24 hours of data")
+    
+    # Time range selection
+    st.subheader("⏰ Time Range")
+    col1, col2 = st.columns(2)
+    
+    with col1:
+        time_start = st.time_input(
+            "Start time:",
+            value=datetime.time(0, 0),
+            help="Filter files from this time"
+        )
+    
+    with col2:
+        time_end = st.time_input(
+            "End time:",
+            value=datetime.time(23, 59),
+            help="Filter files until this time"
+        )
+    
+    # Timestamp selection
+    st.subheader("🕐 Timestamp")
+    
+    # Find available files for the selected date and location
+    all_available_files = find_files_by_date(selected_location, selected_date)
+    
+    # Filter files by time range
+    available_files = filter_timestamps_by_time_range(all_available_files, time_start, time_end)
+    
+    if available_files:
+        # Sort timestamps chronologically
+        sorted_timestamps = sorted(available_files.keys())
         
-        # Location selection
-        st.subheader("🗺️ Location")
-        locations = [
-            "bush_point", 
-            "orcasound_lab", 
-            "port_townsend", 
-            "sunset_bay", 
-            "sandbox"
-        ]
-        selected_location = st.selectbox(
-            "Choose hydrophone location:",
-            locations,
-            index=1  # Default to orcasound_lab
+        selected_timestamp = st.selectbox(
+            "Available timestamps:",
+            sorted_timestamps,
+            help=f"Files found between {time_start.strftime('%H:%M')} and {time_end.strftime('%H:%M')}"
         )
         
-        # Fixed date - representing latest 24 hours (demo data from 2025-09-01)
-        selected_date = datetime.date(2025, 9, 1)
+        # Show file info
+        if selected_timestamp in available_files:
+            file_info = available_files[selected_timestamp]
+            st.info(f"📁 Available files:")
+            for ext, paths in file_info.items():
+                if isinstance(paths, str):
+                    paths = [paths]
+                file_name = ", ".join(os.path.basename(path) for path in paths)
+                st.text(f"{ext}: {file_name}")
+    else:
+        if all_available_files:
+            st.warning(f"No files found between {time_start.strftime('%H:%M')} and {time_end.strftime('%H:%M')} in {selected_location}")
+            st.info(f"Found {len(all_available_files)} files outside the time range")
+        else:
+            st.warning(f"No files found for {selected_location} in the latest 24 hours")
+        selected_timestamp = None
+    
+    # Action button
+    st.markdown("---")
+    process_button = st.button(
+        "🚀 Generate Graphs",
+        type="primary",
+        use_container_width=True,
+        disabled=not bool(available_files)
+    )
+    
+    if process_button and selected_timestamp:
+        st.session_state["plot_selection"] = {
+            "location": selected_location,
+            "date": selected_date,
+            "time_start": time_start,
+            "time_end": time_end,
+            "timestamp": selected_timestamp,
+            "file_info": available_files[selected_timestamp]
+        }
+        st.rerun(scope="app")
+
+def render_plots(selection):
+    """
+    Main content area - spectrogram display for the selection stored by
+    sidebar_controls().
+    """
+    if selection is None:
+        st.info("👈 Please select a timestamp and click 'Generate Graphs' to begin analysis")
+        return
+    
+    selected_location = selection["location"]
+    selected_date = selection["date"]
+    time_start = selection["time_start"]
+    time_end = selection["time_end"]
+    selected_timestamp = selection["timestamp"]
+    
+    # Show selected parameters
+    st.info(f"📍 **Location**: {selected_location} | 📅 **Date**: {selected_date} | ⏰ **Time**: {time_start.strftime('%H:%M')} - {time_end.strftime('%H:%M')} | 🕐 **Timestamp**: {selected_timestamp}")
+    
+    # Progress bar
+    progress_bar = st.progress(0)
+    status_text = st.empty()
+    
+    try:
+        # Get the file paths
+        file_info = selection["file_info"]
+        # Check which files are available
+        has_wav = '.wav' in file_info
+        has_psd = 'psd' in file_info
+        has_bb = 'bb' in file_info
+
+        #----------------Spectrogram from unprocessed WAV----------------#
+        if not has_wav:
+            st.error("No WAV file found for the selected timestamp")
+            return
         
-        # Show current data period
-        st.subheader("📅 Data Period")
-        st.info(f"Latest 24 Hours: {selected_date.strftime('%Y-%m-%d')}")
-        st.caption("Demo data - In production, this would show the most recent 24 hours of data")
+        wav_file_path = file_info['.wav']
         
-        # Time range selection
-        st.subheader("⏰ Time Range")
-        col1, col2 = st.columns(2)
+        status_text.text("Loading audio data...")
+        progress_bar.progress(33)
         
-        with col1:
-            time_start = st.time_input(
-                "Start time:",
-                value=datetime.time(0, 0),
-                help="Filter files from this time"
-            )
+        # Verify file exists
+        if not os.path.exists(wav_file_path):
+            st.error(f"WAV file not found: {wav_file_path}")
+            return
         
-        with col2:
-            time_end = st.time_input(
-                "End time:",
-                value=datetime.time(23, 59),
-                help="Filter files until this time"
-            )
+        status_text.text("Creating spectrogram...")
+        progress_bar.progress(66)
         
-        # Timestamp selection
-        st.subheader("🕐 Timestamp")
+        # Create spectrogram using the function we created earlier
+        fig_spectrogram = spectrogram_figure(wav_file_path, nfft=256)
         
-        # Find available files for the selected date and location
-        all_available_files = find_files_by_date(selected_location, selected_date)
+        status_text.text("Rendering plot...")
+        progress_bar.progress(90)
         
-        # Filter files by time range
-        available_files = filter_timestamps_by_time_range(all_available_files, time_start, time_end)
+        # Display the spectrogram
+        st.subheader("📈 Audio Spectrogram (from WAV file)")
+        st.write("This spectrogram is generated directly from the raw audio file, showing frequency content over time with basic processing.")
+        st.plotly_chart(fig_spectrogram, use_container_width=True)
         
-        if available_files:
-            # Sort timestamps chronologically
-            sorted_timestamps = sorted(available_files.keys())
-            
-            selected_timestamp = st.selectbox(
-                "Available timestamps:",
-                sorted_timestamps,
-                help=f"Files found between {time_start.strftime('%H:%M')} and {time_end.strftime('%H:%M')}"
-            )
+        #----------------PSD Spectrogram----------------#
+        # Load and display PSD spectrogram if available
+        if has_psd:
+            status_text.text("Loading PSD data...")
+            progress_bar.progress(60)
             
-            # Show file info
-            if selected_timestamp in available_files:
-                file_info = available_files[selected_timestamp]
-                st.info(f"📁 Available files:")
-                for ext, path in file_info.items():
-                    file_name = Path(path).name
-                    st.text(f"{ext}: {file_name}")
+            try:
+                psd_df = load_frame(file_info['psd'])
+                fig_psd = create_plotly_psd(psd_df)
+                
+                st.subheader("🔬 Processed Spectrogram (PSD)")
+                st.write("This spectrogram shows processed power spectral density data with advanced filtering and denoising applied, providing a cleaner view of the acoustic signature.")
+                st.plotly_chart(fig_psd, use_container_width=True)
+            except Exception as e:
+                st.warning(f"Could not load PSD data: {e}")
         else:
-            if all_available_files:
-                st.warning(f"No files found between {time_start.strftime('%H:%M')} and {time_end.strftime('%H:%M')} in {selected_location}")
-                st.info(f"Found {len(all_available_files)} files outside the time range")
-            else:
-                st.warning(f"No files found for {selected_location} in the latest 24 hours")
-            selected_timestamp = None
-        
-        # Action button
-        st.markdown("---")
-        process_button = st.button(
-            "🚀 Generate Graphs",
-            type="primary",
-            use_container_width=True,
-            disabled=not bool(available_files)
-        )
-    
-    # Main content area - spectrogram display
-    if process_button and selected_timestamp and available_files:
-        # Show selected parameters
-        st.info(f"📍 **Location**: {selected_location} | 📅 **Date**: {selected_date} | ⏰ **Time**: {time_start.strftime('%H:%M')} - {time_end.strftime('%H:%M')} | 🕐 **Timestamp**: {selected_timestamp}")
+            st.warning("⚠️ No processed PSD data available for this timestamp")
         
-        # Progress bar
-        progress_bar = st.progress(0)
-        status_text = st.empty()
-        
-        try:
-            # Get the file paths
-            file_info = available_files[selected_timestamp]
-            # Check which files are available
-            has_wav = '.wav' in file_info
-            has_psd = 'psd' in file_info
-            has_bb = 'bb' in file_info
-
-            #----------------Spectrogram from unprocessed WAV----------------#
-            if not has_wav:
-                st.error("No WAV file found for the selected timestamp")
-                return
-            
-            wav_file_path = file_info['.wav']
-            
-            status_text.text("Loading audio data...")
-            progress_bar.progress(33)
-            
-            # Verify file exists
-            if not Path(wav_file_path).exists():
-                st.error(f"WAV file not found: {wav_file_path}")
-                return
-            
-            status_text.text("Creating spectrogram...")
-            progress_bar.progress(66)
-            
-            # Create spectrogram using the function we created earlier
-            fig_spectrogram = create_plotly_spectrogram(wav_file_path, nfft=256)
-            
-            status_text.text("Rendering plot...")
-            progress_bar.progress(90)
-            
-            # Display the spectrogram
-            st.subheader("📈 Audio Spectrogram (from WAV file)")
-            st.write("This spectrogram is generated directly from the raw audio file, showing frequency content over time with basic processing.")
-            st.plotly_chart(fig_spectrogram, use_container_width=True)
+        # Load and display broadband RMS if available
+        if has_bb:
+            status_text.text("Loading broadband data...")
+            progress_bar.progress(80)
             
-            #----------------PSD Spectrogram----------------#
-            # Load and display PSD spectrogram if available
-            if has_psd:
-                status_text.text("Loading PSD data...")
-                progress_bar.progress(60)
+            try:
+                bb_df = load_frame(file_info['bb'])
+                fig_bb = create_plotly_bb(bb_df)
                 
-                try:
-                    psd_df = pd.read_pickle(file_info['psd'])
-                    fig_psd = create_plotly_psd(psd_df)
-                    
-                    st.subheader("🔬 Processed Spectrogram (PSD)")
-                    st.write("This spectrogram shows processed power spectral density data with advanced filtering and denoising applied, providing a cleaner view of the acoustic signature.")
-                    st.plotly_chart(fig_psd, use_container_width=True)
-                except Exception as e:
-                    st.warning(f"Could not load PSD data: {e}")
-            else:
-                st.warning("⚠️ No processed PSD data available for this timestamp")
-            
-            # Load and display broadband RMS if available
-            if has_bb:
-                status_text.text("Loading broadband data...")
-                progress_bar.progress(80)
-                
-                try:
-                    bb_df = pd.read_pickle(file_info['bb'])
-                    fig_bb = create_plotly_bb(bb_df)
-                    
-                    st.subheader("📊 Broadband Noise Levels")
-                    st.write("This time series shows the overall acoustic energy levels across all frequencies, useful for identifying periods of increased ship noise or other acoustic events.")
-                    st.plotly_chart(fig_bb, use_container_width=True)
-                except Exception as e:
-                    st.warning(f"Could not load broadband RMS data: {e}")
-            else:
-                st.warning("⚠️ No broadband RMS data available for this timestamp")
-            
-            progress_bar.progress(100)
-            status_text.text("✅ All graphs generated successfully!")
+                st.subheader("📊 Broadband Noise Levels")
+                st.write("This time series shows the overall acoustic energy levels across all frequencies, useful for identifying periods of increased ship noise or other acoustic events.")
+                st.plotly_chart(fig_bb, use_container_width=True)
+            except Exception as e:
+                st.warning(f"Could not load broadband RMS data: {e}")
+        else:
+            st.warning("⚠️ No broadband RMS data available for this timestamp")
+        
+        progress_bar.progress(100)
+        status_text.text("✅ All graphs generated successfully!")
 
-        except Exception as e:
-            st.error(f"Error processing data: {e}")
-            st.exception(e)  # Show full error details for debugging
-        finally:
-            # Clean up progress indicators after a short delay
-            import time
-            time.sleep(1)
-            progress_bar.empty()
-            status_text.empty()
-    
-    elif not available_files:
-        st.info("👈 Please adjust your time range selection from the sidebar")
-    else:
-        st.info("👈 Please select a timestamp and click 'Generate Graphs' to begin analysis")
+    except Exception as e:
+        st.error(f"Error processing data: {e}")
+        st.exception(e)  # Show full error details for debugging
+    finally:
+        # Clean up progress indicators after a short delay
+        import time
+        time.sleep(1)
+        progress_bar.empty()
+        status_text.empty()
+
+def create_sidebar_layout():
+    st.title("🔊 Orcasound Shipnoise Analyzer")
+    
+    # Sidebar for controls
+    with st.sidebar:
+        sidebar_controls()
+    
+    render_plots(st.session_state.get("plot_selection"))
 
 # Main app
 def main():
@@ -1,15 +1,65 @@
+import os
 import numpy as np
-import plotly.graph_objects as go
-import plotly.express as px
-from plotly.subplots import make_subplots
-from scipy.io import wavfile
-from scipy import signal
 
+# scipy and plotly are imported inside the functions that use them so that
+# importing this module on every Streamlit rerun stays cheap
 
-# For save_spectrogram() → Plotly Heatmap
-def create_plotly_spectrogram(filename, nfft=256, noverlap=None):
+
+# Largest heatmap sent to the browser, in cells; bigger arrays are
+# block-averaged down, along the time axis first.
+# Heatmap z values are kept as NumPy arrays, which Plotly >= 6 sends to the
+# browser as base64 typed arrays rather than JSON number grids.
+MAX_HEATMAP_CELLS = 512 * 1500
+
+
+def _block_centres(coords, n, t):
+    """
+    Centre coordinate of each of the n blocks of t consecutive coordinates.
+    """
+    coords = np.asarray(coords)[:n * t].reshape(n, t)
+    if t == 1 or coords.dtype.kind not in "iufmM":
+        return coords[:, 0]
+    first = coords[:, 0]
+    return first + (coords[:, -1] - first) / 2
+
+
+def downsample_heatmap(x, y, z, max_cells=MAX_HEATMAP_CELLS):
+    """
+    Block-averages a heatmap so it has at most max_cells cells. The columns
+    (time) are averaged first, and the rows (frequency) only when a single
+    column is still too tall, so frequency resolution is kept where possible.
+    
+    Args:
+        x: Coordinates of the columns of z
+        y: Coordinates of the rows of z
+        z: 2D array of shape (len(y), len(x))
+    
+    Returns:
+        tuple: (x, y, z) with x and y at the centre of each block
+    """
+    z = np.asarray(z)
+    rows, cols = z.shape
+    if rows * cols <= max_cells:
+        return x, y, z
+    
+    tx = min(cols, -(-rows * cols // max_cells))
+    nx = cols // tx
+    ty = -(-rows * nx // max_cells)
+    ny = rows // ty
+    z = z[:ny * ty, :nx * tx].reshape(ny, ty, nx, tx).mean(axis=(1, 3))
+    return _block_centres(x, nx, tx), _block_centres(y, ny, ty), z
+
+
+def spectrogram_cache_path(filename):
+    """
+    Path of the precomputed spectrogram stored next to a WAV file.
+    """
+    return os.path.splitext(filename)[0] + ".spec.npz"
+
+
+def compute_spectrogram(filename, nfft=256, noverlap=None):
     """
-    Creates a Plotly spectrogram from a WAV file.
+    Computes the spectrogram of a WAV file in dB.
     
     Args:
         filename (str): Path to the input .wav file
@@ -19,8 +69,11 @@ def create_plotly_spectrogram(filename, nfft=256, noverlap=None):
                        Default is nfft//2 if nfft <= 128 else 128.
     
     Returns:
-        plotly.graph_objects.Figure: Interactive spectrogram figure
+        tuple: (frequencies, times, Sxx_db). Sxx_db has shape (freqs, times)
+               for mono files and (channels, freqs, times) for stereo files.
     """
+    from scipy import fft, signal
+    from scipy.io import wavfile
     
     # Set default overlap
     if noverlap is None:
@@ -32,18 +85,85 @@ def create_plotly_spectrogram(filename, nfft=256, noverlap=None):
     except Exception as e:
         raise ValueError(f"Error reading WAV file {filename}: {e}")
     
-    if len(data.shape) == 1:
-        # Create spectrogram using scipy.signal.spectrogram
+    # float32 has plenty of dynamic range here and keeps the FFTs in single
+    # precision instead of letting scipy promote the samples to float64
+    data = np.asarray(data, dtype=np.float32)
+    
+    # Stereo files are read as (samples, channels); put time on the last axis
+    # so both channels are transformed in a single call
+    with fft.set_workers(-1):
         frequencies, times, Sxx = signal.spectrogram(
-            data, 
+            data.T, 
             fs=samplerate,
             nperseg=nfft,
             noverlap=noverlap,
-            scaling='density'
+            scaling='density',
+            mode='psd',
+            axis=-1
         )
-        
-        # Convert to dB scale
-        Sxx_db = 10 * np.log10(Sxx + 1e-10)  # Add small value to avoid log(0)
+    
+    # Convert to dB scale in place, flooring at a small value to avoid log(0)
+    np.maximum(Sxx, 1e-10, out=Sxx)
+    np.log10(Sxx, out=Sxx)
+    Sxx *= 10
+    Sxx_db = Sxx
+    
+    return frequencies, times, Sxx_db
+
+
+def precompute_spectrogram(filename, nfft=256, noverlap=None):
+    """
+    Computes the spectrogram of a WAV file and saves it next to the file so
+    create_plotly_spectrogram() can skip the FFTs.
+    
+    Returns:
+        str: Path of the saved .spec.npz file
+    """
+    frequencies, times, Sxx_db = compute_spectrogram(filename, nfft, noverlap)
+    out_path = spectrogram_cache_path(filename)
+    np.savez_compressed(out_path, f=frequencies, t=times, sxx_db=Sxx_db,
+                        nfft=nfft, noverlap=-1 if noverlap is None else noverlap)
+    return out_path
+
+
+def load_spectrogram(filename, nfft=256, noverlap=None):
+    """
+    Returns the precomputed spectrogram of a WAV file if an up-to-date one was
+    saved with the same parameters, otherwise computes it.
+    """
+    cache_path = spectrogram_cache_path(filename)
+    if (os.path.exists(cache_path)
+            and os.path.getmtime(cache_path) >= os.path.getmtime(filename)):
+        with np.load(cache_path) as spec:
+            if (int(spec["nfft"]) == nfft
+                    and int(spec["noverlap"]) == (-1 if noverlap is None else noverlap)):
+                return spec["f"], spec["t"], spec["sxx_db"]
+    return compute_spectrogram(filename, nfft, noverlap)
+
+
+# For save_spectrogram() → Plotly Heatmap
+def create_plotly_spectrogram(filename, nfft=256, noverlap=None):
+    """
+    Creates a Plotly spectrogram from a WAV file. A precomputed .spec.npz next
+    to the WAV file (see scripts/precompute_spec.py) is used when available.
+    
+    Args:
+        filename (str): Path to the input .wav file
+        nfft (int): The number of data points used in each block for the FFT. 
+                   A power 2 is most efficient. Default is 256.
+        noverlap (int): The number of points of overlap between blocks. 
+                       Default is nfft//2 if nfft <= 128 else 128.
+    
+    Returns:
+        plotly.graph_objects.Figure: Interactive spectrogram figure
+    """
+    import plotly.graph_objects as go
+    from plotly.subplots import make_subplots
+    
+    frequencies, times, Sxx_db = load_spectrogram(filename, nfft, noverlap)
+    
+    if Sxx_db.ndim == 2:
+        times, frequencies, Sxx_db = downsample_heatmap(times, frequencies, Sxx_db)
         
         # Create Plotly heatmap
         fig = go.Figure(data=go.Heatmap(
@@ -57,46 +177,39 @@ def create_plotly_spectrogram(filename, nfft=256, noverlap=None):
         
         # Update layout
         fig.update_layout(
-            title=f"Spectrogram: {filename.split('/')[-1]}",
+            title=f"Spectrogram: {os.path.basename(filename)}",
             xaxis_title="Time (s)",
             yaxis_title="Frequency (Hz)",
             width=800,
             height=500
         )
             
-    if len(data.shape) == 2:
+    if Sxx_db.ndim == 3:
         fig = make_subplots(
             rows=2, cols=1,
             subplot_titles=('Channel 0', 'Channel 1'),
             vertical_spacing=0.08
         )
         for channel in range(2):
-            # Create spectrogram for each channel
-            frequencies, times, Sxx = signal.spectrogram(
-                data[:, channel], 
-                fs=samplerate,
-                nperseg=nfft,
-                noverlap=noverlap,
-                scaling='density'
-            )
-            
-            Sxx_db = 10 * np.log10(Sxx + 1e-10)
+            x, y, z = downsample_heatmap(times, frequencies, Sxx_db[channel])
             
             # Add heatmap to subplot
             fig.add_trace(
-                go.Heatmap(
-                    x=times,
-                    y=frequencies,
-                    z=Sxx_db,
-                    colorscale='Viridis',
-                    showscale=(channel == 0),  # Only show colorbar for first plot
-                    colorbar=dict(title="Power (dB)") if channel == 0 else None,
-                    hovertemplate=f'Ch{channel} - Time: %{{x:.2f}}s<br>Frequency: %{{y:.1f}}Hz<br>Power: %{{z:.1f}}dB<extra></extra>'
-                ),
+                go.Heatmap(x=x, y=y, z=z, name=f'Ch{channel}', showscale=False),
                 row=channel+1, col=1
             )
+        
+        # Properties shared by both channels are set once for all traces
+        fig.update_traces(
+            colorscale='Viridis',
+            hovertemplate='%{fullData.name} - Time: %{x:.2f}s<br>Frequency: %{y:.1f}Hz<br>Power: %{z:.1f}dB<extra></extra>'
+        )
+        # Only show colorbar for first plot
+        fig.data[0].showscale = True
+        fig.data[0].colorbar = dict(title="Power (dB)")
+        
         fig.update_layout(
-            title=f"Stereo Spectrogram: {filename.split('/')[-1]}",
+            title=f"Stereo Spectrogram: {os.path.basename(filename)}",
             height=800,
             width=800
         )
@@ -112,6 +225,8 @@ def create_plotly_spectrogram(filename, nfft=256, noverlap=None):
 
 # For plot_bb() → Plotly Line Chart  
 def create_plotly_bb(bb_df):
+    import plotly.graph_objects as go
+    
     fig = go.Figure(data=go.Scatter(
         x=bb_df.index, 
         y=bb_df.iloc[:, 0],
@@ -135,9 +250,22 @@ def create_plotly_psd(psd_df):
 
     Returns: Spectral plot
     """
+    import plotly.graph_objects as go
 
+    # Frequency bins stored as strings are cast once so the log axis is numeric
+    frequencies = psd_df.columns.to_numpy()
+    if frequencies.dtype == object:
+        try:
+            frequencies = frequencies.astype(np.float32)
+        except (TypeError, ValueError):
+            pass
+    
+    # Contiguous float32 (frequencies, times) array for the heatmap
+    z = np.ascontiguousarray(psd_df.to_numpy(dtype=np.float32, copy=False).T)
+    
+    x, y, z = downsample_heatmap(psd_df.index.to_numpy(), frequencies, z)
     fig = go.Figure(
-        data=go.Heatmap(x=psd_df.index, y=psd_df.columns, z=psd_df.values.transpose(), colorscale='Viridis',
+        data=go.Heatmap(x=x, y=y, z=z, colorscale='Viridis',
                         colorbar={"title": 'Magnitude'}))
     fig.update_layout(
         title="Hydrophone Power Spectral Density",
@@ -0,0 +1,40 @@
+"""
+Re-saves the bb/psd DataFrame pickles under output/ as zstd-compressed Parquet
+files next to the originals. The app reads the Parquet copy when one exists.
+
+Usage:
+    python scripts/pickle_to_parquet.py [--root output] [--force]
+"""
+import argparse
+import glob
+import os
+
+import pandas as pd
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Convert bb/psd pickles under output/ to Parquet.")
+    parser.add_argument("--root", default="output", help="Directory holding <location>/<id>/pkl folders")
+    parser.add_argument("--force", action="store_true", help="Rewrite Parquet files that are up to date")
+    args = parser.parse_args()
+
+    pickle_files = sorted(glob.glob(os.path.join(args.root, "*", "*", "pkl", "*", "*.pickle")))
+    for pickle_file in pickle_files:
+        # Skip resource-fork files such as ._2025-09-01T07-00-19-000.pickle
+        if os.path.basename(pickle_file).startswith("._"):
+            continue
+        parquet_file = os.path.splitext(pickle_file)[0] + ".parquet"
+        if (not args.force and os.path.exists(parquet_file)
+                and os.path.getmtime(parquet_file) >= os.path.getmtime(pickle_file)):
+            continue
+
+        df = pd.read_pickle(pickle_file)
+        # Parquet requires string column names; the app converts them back.
+        # The index is kept through the pandas metadata pyarrow writes.
+        df.columns = df.columns.astype(str)
+        df.to_parquet(parquet_file, compression="zstd")
+        print(parquet_file)
+
+
+if __name__ == "__main__":
+    main()
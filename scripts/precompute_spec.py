@@ -0,0 +1,38 @@
+"""
+Precomputes spectrograms for every WAV file under output/ so the app can load
+them instead of running the FFTs on each "Generate Graphs" click.
+
+Usage:
+    python scripts/precompute_spec.py [--root output] [--nfft 256] [--force]
+"""
+import argparse
+import glob
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from plotutils import precompute_spectrogram, spectrogram_cache_path
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Precompute spectrograms for WAV files under output/.")
+    parser.add_argument("--root", default="output", help="Directory holding <location>/<id>/wav folders")
+    parser.add_argument("--nfft", type=int, default=256, help="FFT block size used by the app")
+    parser.add_argument("--force", action="store_true", help="Recompute spectrograms that are up to date")
+    args = parser.parse_args()
+
+    wav_files = sorted(glob.glob(os.path.join(args.root, "*", "*", "wav", "*.wav")))
+    for wav_file in wav_files:
+        # Skip resource-fork files such as ._2025-09-01T07-00-19-000.wav
+        if os.path.basename(wav_file).startswith("._"):
+            continue
+        cache_path = spectrogram_cache_path(wav_file)
+        if (not args.force and os.path.exists(cache_path)
+                and os.path.getmtime(cache_path) >= os.path.getmtime(wav_file)):
+            continue
+        print(precompute_spectrogram(wav_file, nfft=args.nfft))
+
+
+if __name__ == "__main__":
+    main()